@@ -1,135 +1,96 @@
-import streamlit as st
-import google_auth_oauthlib.flow
-import googleapiclient.discovery
-import googleapiclient.errors
-
-# --------------------------------------------------------------------------------
-# SCOPES: using force-ssl for additional access (e.g., comments)
-# --------------------------------------------------------------------------------
-SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
-
-API_SERVICE_NAME = "youtube"
-API_VERSION = "v3"
-
-# This must match exactly what is set in Google Cloud Console's Authorized redirect URIs
-REDIRECT_URI = "https://ytappapi.streamlit.app"
-
-
-def get_flow():
-    """
-    Create and return an OAuth 2.0 flow object using credentials from Streamlit Secrets.
-    """
-    return google_auth_oauthlib.flow.Flow.from_client_config(
-        st.secrets["client_secret"],
-        scopes=SCOPES,
-        redirect_uri=REDIRECT_URI
-    )
-
-
-def build_youtube_client(credentials):
-    """
-    Build the YouTube API client using the provided credentials.
-    """
-    return googleapiclient.discovery.build(
-        API_SERVICE_NAME, API_VERSION, credentials=credentials
-    )
-
-
-def fetch_liked_videos(youtube):
-    """
-    Fetch the user's liked videos (if public).
-    """
-    request = youtube.videos().list(
-        part="snippet,contentDetails",
-        myRating="like",
-        maxResults=10
-    )
-    return request.execute()
-
-
-def fetch_subscriptions(youtube):
-    """
-    Fetch the user's subscriptions (if public).
-    """
-    request = youtube.subscriptions().list(
-        part="snippet,contentDetails",
-        mine=True,
-        maxResults=10
-    )
-    return request.execute()
+import json
 
+import streamlit as st
 
-def fetch_playlists(youtube):
+from yt_api import (
+    MAX_RESULTS,
+    build_youtube_client,
+    exchange_code,
+    fetch_all,
+    fetch_channel_comments,
+    fetch_liked_videos,
+    fetch_playlists,
+    fetch_subscriptions,
+    forget_credentials,
+    get_channel_id,
+    get_authorization_url,
+    get_user_id,
+    store_credentials,
+)
+
+# Responses bigger than this (serialized JSON, in bytes) are shown as a table, not a JSON tree
+LARGE_RESPONSE_BYTES = 50_000
+
+
+def show_response(response):
     """
-    Fetch the user's playlists.
+    Render an API response: large item lists as a table, anything else as a collapsed JSON tree.
     """
-    request = youtube.playlists().list(
-        part="snippet,contentDetails",
-        mine=True,
-        maxResults=10
-    )
-    return request.execute()
-
+    if "items" in response and len(json.dumps(response)) > LARGE_RESPONSE_BYTES:
+        import pandas as pd
 
-def fetch_channel_comments(youtube):
-    """
-    Fetch comment threads from the user's channel.
-    Requires 'youtube.force-ssl' scope and that the account has a channel.
-    """
-    # First, retrieve the user's channel ID
-    channels_response = youtube.channels().list(
-        part="id",
-        mine=True
-    ).execute()
-
-    items = channels_response.get("items", [])
-    if not items:
-        st.warning("No channel found for this account.")
-        return None
-
-    channel_id = items[0]["id"]
-
-    # Now fetch comment threads for that channel
-    request = youtube.commentThreads().list(
-        part="snippet",
-        allThreadsRelatedToChannelId=channel_id,
-        maxResults=10
-    )
-    return request.execute()
+        st.dataframe(pd.json_normalize(response["items"]))
+    else:
+        st.json(response, expanded=False)
 
 
 def show_data_options(youtube):
     """
     Show a selection of data types to fetch from YouTube.
     """
+    from googleapiclient.errors import HttpError
+
     st.write("**Select the type of YouTube data to retrieve:**")
     option = st.radio(
         label="Data type",
-        options=["Liked Videos", "Comments", "Shares (Placeholder)", "Playlists", "Subscriptions"]
+        options=["Liked Videos", "Comments", "Shares (Placeholder)", "Playlists", "Subscriptions", "All"]
+    )
+    limit = st.number_input(
+        label="Maximum results",
+        min_value=1,
+        max_value=1000,
+        value=MAX_RESULTS,
+        step=MAX_RESULTS,
+        help="Results are fetched in pages of 50. 'All' fetches each category's pages in parallel."
     )
 
     if st.button("Fetch Data"):
+        user_id = get_user_id(st.session_state["credentials"])
         try:
             if option == "Liked Videos":
-                response = fetch_liked_videos(youtube)
+                response = fetch_liked_videos(user_id, youtube, limit)
             elif option == "Comments":
-                response = fetch_channel_comments(youtube)
+                channel_id = get_channel_id(youtube)
+                if channel_id is None:
+                    st.warning("No channel found for this account.")
+                    return
+                response = fetch_channel_comments(channel_id, youtube, limit)
             elif option == "Shares (Placeholder)":
                 st.warning("YouTube API does not provide direct 'Shares' data.")
                 return
             elif option == "Playlists":
-                response = fetch_playlists(youtube)
+                response = fetch_playlists(user_id, youtube, limit)
             elif option == "Subscriptions":
-                response = fetch_subscriptions(youtube)
+                response = fetch_subscriptions(user_id, youtube, limit)
+            elif option == "All":
+                credentials = st.session_state["credentials"]
+                response = fetch_all(user_id, youtube, credentials, get_channel_id(youtube), limit)
             else:
                 st.error("Invalid option selected.")
                 return
 
-            if response is not None:
-                st.json(response)
+            if response is not None and option == "All":
+                for name, section in response.items():
+                    st.subheader(name)
+                    if "error" in section:
+                        st.error(f"HTTP error: {section['error']}")
+                    else:
+                        show_response(section)
+            elif response is not None:
+                show_response(response)
             else:
                 st.warning("No data returned. Possibly the data is private or unavailable.")
-        except googleapiclient.errors.HttpError as e:
+        except HttpError as e:
             st.error(f"HTTP error: {e}")
         except Exception as e:
             st.error(f"Unexpected error: {e}")
@@ -140,35 +101,51 @@ def main():
 
     # If credentials exist in session_state, we are already authenticated
     if "credentials" in st.session_state:
-        st.success("Already authenticated with YouTube!")
-        youtube = build_youtube_client(st.session_state["credentials"])
-        show_data_options(youtube)
-        return
+        from google.auth.exceptions import RefreshError
+        try:
+            youtube = build_youtube_client(st.session_state["credentials"])
+        except RefreshError:
+            # Refresh token revoked or expired: fall through to the authorize link
+            forget_credentials()
+            st.warning("Your YouTube authorization has expired. Please authorize again.")
+        else:
+            st.success("Already authenticated with YouTube!")
+            show_data_options(youtube)
+            return
 
     # Check for OAuth code in the URL query parameters
-    query_params = st.experimental_get_query_params()
-    if "code" not in query_params:
-        # No code: prompt user to authenticate
-        flow = get_flow()
-        auth_url, _ = flow.authorization_url(prompt="consent")
+    code = st.query_params.get("code")
+    if code is None or code == st.session_state.get("last_code"):
+        # No new code (a code we already tried can't be redeemed again): prompt user to authenticate
+        auth_url = get_authorization_url()
         st.markdown(f"[Authorize with Google]({auth_url})", unsafe_allow_html=True)
         st.info("Click the link above to authorize the app to access your YouTube data.")
     else:
-        # Code exists: attempt to exchange it for tokens
-        code = query_params["code"][0]
-        flow = get_flow()
-        try:
-            flow.fetch_token(code=code)
-            st.session_state["credentials"] = flow.credentials  # Save tokens for later use
+        # Code exists: attempt to exchange it for tokens. Remember it first, so a
+        # rerun in this session never POSTs the same code to Google again.
+        st.session_state["last_code"] = code
+        state = st.query_params.get("state")
 
-            # Clear the code from the URL to prevent reuse on reruns
-            st.experimental_set_query_params()
+        # Clear the code from the URL so a reload doesn't retry it, whether or not it works
+        st.query_params.clear()
 
-            st.success("Successfully authenticated!")
-            youtube = build_youtube_client(st.session_state["credentials"])
-            show_data_options(youtube)
+        try:
+            store_credentials(exchange_code(code, state))  # Save tokens for later use
         except Exception as e:
             st.error(f"Error fetching token: {e}")
+            return
+
+        st.success("Successfully authenticated!")
+        youtube = build_youtube_client(st.session_state["credentials"])
+
+        # Resolve the channel ID as part of the sign-in handshake, so the Comments
+        # and 'All' fetches never wait on a separate channels.list round-trip
+        try:
+            get_channel_id(youtube)
+        except Exception:
+            pass  # Not fatal: get_channel_id() retries on the first fetch that needs it
+
+        show_data_options(youtube)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,436 @@
+"""
+YouTube Data API helpers: OAuth flow, client construction and cached data fetchers.
+"""
+import concurrent.futures
+import hashlib
+import time
+
+import streamlit as st
+import google_auth_oauthlib.flow
+
+# --------------------------------------------------------------------------------
+# SCOPES: using force-ssl for additional access (e.g., comments)
+# --------------------------------------------------------------------------------
+SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
+
+API_SERVICE_NAME = "youtube"
+API_VERSION = "v3"
+DISCOVERY_URL = "https://youtube.googleapis.com/$discovery/rest?version=v3"
+
+# This must match exactly what is set in Google Cloud Console's Authorized redirect URIs
+REDIRECT_URI = "https://ytappapi.streamlit.app"
+
+# Socket timeout for YouTube API calls (seconds)
+HTTP_TIMEOUT = 15
+
+# Largest page size the YouTube list endpoints accept
+MAX_RESULTS = 50
+
+# How long an authorization link's PKCE verifier is kept waiting for its callback (seconds)
+VERIFIER_TTL = 600
+
+# How long fetched API responses are reused before hitting YouTube again (seconds)
+CACHE_TTL = 300
+
+
+@st.cache_resource(ttl=3600)
+def get_client_config():
+    """
+    Read the OAuth client configuration from Streamlit Secrets once per process.
+    """
+    return st.secrets["client_secret"]
+
+
+@st.cache_resource
+def get_pending_verifiers():
+    """
+    Map the OAuth `state` of each authorization link to (PKCE code verifier, creation time).
+    Google redirects back into a fresh browser session, so the verifier can't be
+    carried in session_state; it stays server-side and is looked up by `state`.
+    """
+    return {}
+
+
+def add_pending_verifier(state, verifier):
+    """
+    Register the verifier for a new authorization link, pruning entries for links
+    older than VERIFIER_TTL so abandoned sign-ins don't pile up.
+    """
+    pending = get_pending_verifiers()
+    now = time.monotonic()
+    for old_state, (_, created_at) in list(pending.items()):
+        if now - created_at > VERIFIER_TTL:
+            pending.pop(old_state, None)
+    pending[state] = (verifier, now)
+
+
+def pop_pending_verifier(state):
+    """
+    Remove and return the verifier registered for `state` (None if unknown or expired).
+    """
+    verifier, created_at = get_pending_verifiers().pop(state, (None, 0))
+    if time.monotonic() - created_at > VERIFIER_TTL:
+        return None
+    return verifier
+
+
+def get_flow():
+    """
+    Return the OAuth 2.0 flow object for this session, creating it on first use.
+    The flow is per-user, so it lives in session_state rather than a process-wide cache.
+    """
+    if "flow" not in st.session_state:
+        st.session_state["flow"] = google_auth_oauthlib.flow.Flow.from_client_config(
+            get_client_config(),
+            scopes=SCOPES,
+            redirect_uri=REDIRECT_URI
+        )
+    return st.session_state["flow"]
+
+
+def get_authorization_url():
+    """
+    Return this session's Google authorization link, creating it on first use and
+    again once its verifier has expired.
+    Its PKCE code verifier is registered under the link's `state` for the callback.
+    """
+    auth_url, created_at = st.session_state.get("auth_url", (None, 0))
+    if auth_url is None or time.monotonic() - created_at > VERIFIER_TTL:
+        flow = get_flow()
+        auth_url, state = flow.authorization_url(prompt="consent")
+        add_pending_verifier(state, flow.code_verifier)
+        st.session_state["auth_url"] = (auth_url, time.monotonic())
+    return auth_url
+
+
+def exchange_code(code, state):
+    """
+    Exchange an authorization code for credentials, using the PKCE code verifier
+    registered for `state` when the authorization link was created.
+    Callers must not pass the same code twice (Google rejects a reused code);
+    main() tracks the last code it tried in session_state.
+    """
+    flow = get_flow()
+    flow.code_verifier = pop_pending_verifier(state)
+    flow.fetch_token(code=code)
+    return flow.credentials
+
+
+@st.cache_resource
+def get_discovery_document():
+    """
+    Load the YouTube discovery document once per process.
+    Uses the copy bundled with google-api-python-client and only fetches it
+    over the network if that copy is missing.
+    """
+    import googleapiclient.discovery_cache
+    import requests
+
+    document = googleapiclient.discovery_cache.get_static_doc(API_SERVICE_NAME, API_VERSION)
+    if document is None:
+        response = requests.get(DISCOVERY_URL, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        document = response.text
+    return document
+
+
+def build_youtube_client(credentials):
+    """
+    Build the YouTube API client using the provided credentials.
+    The client is kept in session_state until store_credentials() replaces the
+    credentials, so reruns reuse it along with its long-lived HTTP transport and
+    the open keep-alive connection to googleapis.com.
+    Expired credentials are refreshed first so the user doesn't have to re-authorize.
+    """
+    # Imported here rather than at module level: the pre-auth landing page never needs them
+    import google.auth.transport.requests
+
+    if credentials.expired and credentials.refresh_token:
+        credentials.refresh(google.auth.transport.requests.Request())
+        st.session_state["credentials"] = credentials
+
+    if "youtube" in st.session_state:
+        return st.session_state["youtube"]
+
+    youtube = create_youtube_client(credentials, get_discovery_document())
+    st.session_state["youtube"] = youtube
+    return youtube
+
+
+def create_youtube_client(credentials, document):
+    """
+    Create a YouTube API client with its own HTTP transport from a loaded discovery document.
+    Makes no Streamlit calls, so clients can be created for worker threads.
+    """
+    import google_auth_httplib2
+    import googleapiclient.discovery
+    import httplib2
+
+    http = google_auth_httplib2.AuthorizedHttp(
+        credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT)
+    )
+    return googleapiclient.discovery.build_from_document(document, http=http)
+
+
+def store_credentials(credentials):
+    """
+    Save newly obtained credentials, dropping the client and user details
+    derived from any previous ones.
+    """
+    st.session_state["credentials"] = credentials
+    for key in ("youtube", "user_id", "channel_id"):
+        st.session_state.pop(key, None)
+
+
+def forget_credentials():
+    """
+    Drop the stored credentials and everything derived from them, e.g. after the
+    refresh token was revoked, so the user is sent through authorization again.
+    """
+    for key in ("credentials", "youtube", "user_id", "channel_id", "auth_url"):
+        st.session_state.pop(key, None)
+
+
+def get_user_id(credentials):
+    """
+    Return a stable fingerprint of the signed-in user, used to key cached API responses.
+    """
+    if "user_id" not in st.session_state:
+        token = credentials.refresh_token or credentials.token
+        st.session_state["user_id"] = hashlib.sha256(token.encode()).hexdigest()
+    return st.session_state["user_id"]
+
+
+def get_channel_id(youtube):
+    """
+    Return the user's channel ID (None if the account has no channel).
+    The lookup only runs once per session; the result is kept in session_state.
+    """
+    if "channel_id" not in st.session_state:
+        channels_response = youtube.channels().list(
+            part="id",
+            mine=True,
+            fields="items/id"
+        ).execute()
+        items = channels_response.get("items", [])
+        st.session_state["channel_id"] = items[0]["id"] if items else None
+    return st.session_state["channel_id"]
+
+
+def liked_videos_request(youtube, max_results=MAX_RESULTS):
+    """
+    Build (but do not execute) the request for the user's liked videos.
+    """
+    return youtube.videos().list(
+        part="snippet,contentDetails",
+        myRating="like",
+        maxResults=max_results,
+        fields="nextPageToken,items(id,snippet(title,channelTitle,publishedAt,"
+               "thumbnails/default/url),contentDetails/duration)"
+    )
+
+
+def subscriptions_request(youtube, max_results=MAX_RESULTS):
+    """
+    Build (but do not execute) the request for the user's subscriptions.
+    """
+    return youtube.subscriptions().list(
+        part="snippet,contentDetails",
+        mine=True,
+        maxResults=max_results,
+        fields="nextPageToken,items(id,snippet(title,resourceId/channelId,"
+               "thumbnails/default/url),contentDetails/totalItemCount)"
+    )
+
+
+def playlists_request(youtube, max_results=MAX_RESULTS):
+    """
+    Build (but do not execute) the request for the user's playlists.
+    """
+    return youtube.playlists().list(
+        part="snippet,contentDetails",
+        mine=True,
+        maxResults=max_results,
+        fields="nextPageToken,items(id,snippet(title,publishedAt,"
+               "thumbnails/default/url),contentDetails/itemCount)"
+    )
+
+
+def channel_request(youtube):
+    """
+    Build (but do not execute) the request for the user's channel details.
+    """
+    return youtube.channels().list(
+        part="snippet,statistics",
+        mine=True,
+        fields="items(id,snippet(title,customUrl,thumbnails/default/url),statistics)"
+    )
+
+
+def channel_comments_request(youtube, channel_id, max_results=MAX_RESULTS):
+    """
+    Build (but do not execute) the request for comment threads on the given channel.
+    """
+    return youtube.commentThreads().list(
+        part="snippet",
+        allThreadsRelatedToChannelId=channel_id,
+        maxResults=max_results,
+        fields="nextPageToken,items(id,snippet(videoId,totalReplyCount,"
+               "topLevelComment/snippet(authorDisplayName,textDisplay,publishedAt)))"
+    )
+
+
+def fetch_pages(collection, request, limit):
+    """
+    Execute a list request and follow its next pages until `limit` items are collected.
+    """
+    items = []
+    while request is not None and len(items) < limit:
+        response = request.execute()
+        items.extend(response.get("items", []))
+        request = collection.list_next(request, response)
+    return {"items": items[:limit]}
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_liked_videos(user_id, _youtube, limit=MAX_RESULTS):
+    """
+    Fetch up to `limit` of the user's liked videos (if public).
+    """
+    request = liked_videos_request(_youtube, min(limit, MAX_RESULTS))
+    return fetch_pages(_youtube.videos(), request, limit)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_subscriptions(user_id, _youtube, limit=MAX_RESULTS):
+    """
+    Fetch up to `limit` of the user's subscriptions (if public).
+    """
+    request = subscriptions_request(_youtube, min(limit, MAX_RESULTS))
+    return fetch_pages(_youtube.subscriptions(), request, limit)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_playlists(user_id, _youtube, limit=MAX_RESULTS):
+    """
+    Fetch up to `limit` of the user's playlists.
+    """
+    request = playlists_request(_youtube, min(limit, MAX_RESULTS))
+    return fetch_pages(_youtube.playlists(), request, limit)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_channel_comments(channel_id, _youtube, limit=MAX_RESULTS):
+    """
+    Fetch up to `limit` comment threads from the user's channel.
+    Requires 'youtube.force-ssl' scope and that the account has a channel.
+    """
+    request = channel_comments_request(_youtube, channel_id, min(limit, MAX_RESULTS))
+    return fetch_pages(_youtube.commentThreads(), request, limit)
+
+
+def fetch_all_pages(credentials, channel_id, limit):
+    """
+    Fetch up to `limit` items of every category, following each category's pages
+    on its own worker thread so the categories' round-trips overlap.
+    Each worker builds its own client, since httplib2 connections are not thread-safe.
+    """
+    import google.auth.exceptions
+    import google.auth.transport.requests
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    sections = {
+        "Liked Videos": lambda yt: fetch_pages(yt.videos(), liked_videos_request(yt), limit),
+        "Subscriptions": lambda yt: fetch_pages(yt.subscriptions(), subscriptions_request(yt), limit),
+        "Playlists": lambda yt: fetch_pages(yt.playlists(), playlists_request(yt), limit),
+        "Channel": lambda yt: channel_request(yt).execute(),
+    }
+    if channel_id is not None:
+        sections["Comments"] = lambda yt: fetch_pages(
+            yt.commentThreads(), channel_comments_request(yt, channel_id), limit
+        )
+
+    # The workers share one Credentials object; refresh it here, before fanning out,
+    # rather than letting several threads refresh it at once
+    if not credentials.valid:
+        credentials.refresh(google.auth.transport.requests.Request())
+
+    document = get_discovery_document()
+
+    def run(fetch):
+        try:
+            return fetch(create_youtube_client(credentials, document))
+        except (HttpError, httplib2.HttpLib2Error, OSError, google.auth.exceptions.GoogleAuthError) as e:
+            return {"error": str(e)}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sections)) as executor:
+        futures = {name: executor.submit(run, fetch) for name, fetch in sections.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+class IncompleteResults(Exception):
+    """
+    Raised out of a cached fetch when some sections failed, so Streamlit doesn't
+    cache (and replay) a temporary error; carries the sections that did load.
+    """
+
+    def __init__(self, results):
+        super().__init__("Some sections could not be fetched")
+        self.results = results
+
+
+def fetch_all(user_id, youtube, credentials, channel_id, limit=MAX_RESULTS):
+    """
+    Fetch liked videos, subscriptions, playlists, channel details and
+    (if the account has a channel) its comments.
+    A section whose request fails holds {"error": ...} instead of its data, so one
+    failure doesn't discard the others. Only fully successful results are cached.
+    """
+    try:
+        return fetch_all_cached(user_id, youtube, credentials, channel_id, limit)
+    except IncompleteResults as e:
+        return e.results
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_all_cached(user_id, _youtube, _credentials, channel_id, limit):
+    """
+    Cached body of fetch_all(); raises IncompleteResults if any section failed.
+    Up to MAX_RESULTS items each fit in one page, so they go out as a single batch
+    HTTP request; larger limits need pagination and use fetch_all_pages() instead.
+    """
+    if limit > MAX_RESULTS:
+        results = fetch_all_pages(_credentials, channel_id, limit)
+    else:
+        results = fetch_all_batch(_youtube, channel_id, limit)
+
+    if any("error" in section for section in results.values()):
+        raise IncompleteResults(results)
+    return results
+
+
+def fetch_all_batch(youtube, channel_id, limit):
+    """
+    Fetch the first `limit` items of every category in a single batch HTTP request.
+    """
+    results = {}
+
+    def collect(request_id, response, exception):
+        if exception is not None:
+            results[request_id] = {"error": str(exception)}
+        else:
+            results[request_id] = response
+
+    batch = youtube.new_batch_http_request(callback=collect)
+    batch.add(liked_videos_request(youtube, limit), request_id="Liked Videos")
+    batch.add(subscriptions_request(youtube, limit), request_id="Subscriptions")
+    batch.add(playlists_request(youtube, limit), request_id="Playlists")
+    batch.add(channel_request(youtube), request_id="Channel")
+    if channel_id is not None:
+        batch.add(
+            channel_comments_request(youtube, channel_id, limit),
+            request_id="Comments"
+        )
+    batch.execute()
+    return results